@@ -1366,12 +1366,14 @@ class Function(object):
     # to create variables once, thereby allowing methods to be decorated with
     # tf.function. Keeps a cache to avoid retracing the function every time the
     # descriptor is accessed.
-    if instance not in self._descriptor_cache:
-      if instance is None:
-        return self
-      self._descriptor_cache[instance] = (
-          function_lib.class_method_to_instance_method(self, instance))
-    return self._descriptor_cache[instance]
+    if instance is None:
+      return self
+    instance_function = self._descriptor_cache.get(instance)
+    if instance_function is None:
+      instance_function = function_lib.class_method_to_instance_method(
+          self, instance)
+      self._descriptor_cache[instance] = instance_function
+    return instance_function
 
 
 @tf_export("function")
@@ -3151,19 +3151,20 @@ class Function(object):
     # to create variables once, thereby allowing methods to be decorated with
     # defun. Keeps a cache to avoid retracing the function every time the
     # descriptor is accessed.
-    if instance not in self._descriptor_cache:
-      if instance is None:
-        return self
+    if instance is None:
+      return self
+    instance_function = self._descriptor_cache.get(instance)
+    if instance_function is None:
       # If there is no instance-specific `Function` in the cache, we construct
       # an instance-specific `Function` that uses a weak reference to the
       # instance (so that the instance will be correctly gc'd).
 
       # And finally add the wrapped function to the description cache
-      self._descriptor_cache[instance] = class_method_to_instance_method(
-          self, instance)
+      instance_function = class_method_to_instance_method(self, instance)
+      self._descriptor_cache[instance] = instance_function
 
     # Return the cached `Function` for the instance
-    return self._descriptor_cache[instance]
+    return instance_function
 
   def _cache_key(self,
                  args,
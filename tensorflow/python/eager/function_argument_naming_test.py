@@ -26,12 +26,25 @@ from tensorflow.python.framework import constant_op
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops
 from tensorflow.python.framework import tensor_spec
-from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import math_ops
 from tensorflow.python.ops import variables
 from tensorflow.python.platform import test
 
 
+_SCALAR_F32 = tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32)
+_VECTOR_F32 = tensor_spec.TensorSpec(shape=(None,), dtype=dtypes.float32)
+
+
+def _input_names(concrete_function):
+  """Returns the op names and `_user_specified_name`s of the inputs."""
+  names = []
+  user_specified_names = []
+  for inp in concrete_function.inputs:
+    names.append(inp.op.name)
+    user_specified_names.append(inp.op.get_attr('_user_specified_name'))
+  return names, user_specified_names
+
+
 @parameterized.named_parameters(
     dict(testcase_name='Defun', function_decorator=function.defun),
     dict(testcase_name='DefFunction', function_decorator=def_function.function))
@@ -42,18 +55,10 @@ class ArgumentNamingTests(test.TestCase, parameterized.TestCase):
     @function_decorator
     def fn(a, b):
       return a + b, a * b
-    # Call the function to make def_function happy
-    fn(array_ops.ones([]), array_ops.ones([]))
-
-    fn_op = fn.get_concrete_function(
-        tensor_spec.TensorSpec(shape=(None,), dtype=dtypes.float32),
-        tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32))
-    self.assertEqual(
-        ['a', 'b'],
-        [inp.op.name for inp in fn_op.inputs])
-    self.assertEqual(
-        [b'a', b'b'],
-        [inp.op.get_attr('_user_specified_name') for inp in fn_op.inputs])
+    fn_op = fn.get_concrete_function(_VECTOR_F32, _SCALAR_F32)
+    names, user_specified_names = _input_names(fn_op)
+    self.assertEqual(['a', 'b'], names)
+    self.assertEqual([b'a', b'b'], user_specified_names)
     self.assertEqual(2, len(fn_op.graph.structured_outputs))
     self.assertAllClose(
         [3., 2.],
@@ -66,18 +71,10 @@ class ArgumentNamingTests(test.TestCase, parameterized.TestCase):
     @function_decorator
     def fn(a, b):
       return a + b, a * b
-    # Call the function to make def_function happy
-    fn(array_ops.ones([]), array_ops.ones([]))
-
-    fn_op = fn.get_concrete_function(
-        tensor_spec.TensorSpec(shape=(None,), dtype=dtypes.float32),
-        variables.Variable(1.))
-    self.assertEqual(
-        ['a', 'b'],
-        [inp.op.name for inp in fn_op.inputs])
-    self.assertEqual(
-        [b'a', b'b'],
-        [inp.op.get_attr('_user_specified_name') for inp in fn_op.inputs])
+    fn_op = fn.get_concrete_function(_VECTOR_F32, variables.Variable(1.))
+    names, user_specified_names = _input_names(fn_op)
+    self.assertEqual(['a', 'b'], names)
+    self.assertEqual([b'a', b'b'], user_specified_names)
     self.assertEqual(2, len(fn_op.graph.structured_outputs))
 
   def testDictReturned(self, function_decorator):
@@ -85,20 +82,11 @@ class ArgumentNamingTests(test.TestCase, parameterized.TestCase):
     def fn(x, z=(1., 2.), y=3.):
       z1, z2 = z
       return {'alpha': x + y + z1, 'beta': x * y + z2}
-    # Call the function to make def_function happy
-    fn(array_ops.ones([]))
-
-    fn_op = fn.get_concrete_function(
-        x=tensor_spec.TensorSpec(shape=(None,), dtype=dtypes.float32),
-        y=tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32))
-    self.assertEqual(
-        ['x', 'y'],
-        [inp.op.name for inp in fn_op.inputs])
-    self.assertEqual(
-        [b'x', b'y'],
-        [inp.op.get_attr('_user_specified_name') for inp in fn_op.inputs])
-    self.assertEqual({'alpha', 'beta'},
-                     set(fn_op.graph.structured_outputs.keys()))
+    fn_op = fn.get_concrete_function(x=_VECTOR_F32, y=_SCALAR_F32)
+    names, user_specified_names = _input_names(fn_op)
+    self.assertEqual(['x', 'y'], names)
+    self.assertEqual([b'x', b'y'], user_specified_names)
+    self.assertEqual({'alpha', 'beta'}, set(fn_op.graph.structured_outputs))
 
     fn_op2 = fn.get_concrete_function(
         z=(tensor_spec.TensorSpec(shape=(None,), dtype=dtypes.float32,
@@ -107,25 +95,19 @@ class ArgumentNamingTests(test.TestCase, parameterized.TestCase):
                                   name='z_second')),
         y=tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32, name='custom'),
         x=4.)
-    self.assertEqual(
-        ['z_first', 'z_second', 'custom'],
-        [inp.op.name for inp in fn_op2.inputs])
-    self.assertEqual(
-        [b'z_first', b'z_second', b'custom'],
-        [inp.op.get_attr('_user_specified_name') for inp in fn_op2.inputs])
+    names, user_specified_names = _input_names(fn_op2)
+    self.assertEqual(['z_first', 'z_second', 'custom'], names)
+    self.assertEqual([b'z_first', b'z_second', b'custom'], user_specified_names)
 
     fn_op3 = fn.get_concrete_function(
         tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32, name='custom'),
         z=(tensor_spec.TensorSpec(shape=(None,), dtype=dtypes.float32,
                                   name='z1'),
            tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32, name='z2')),
-        y=tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32))
-    self.assertEqual(
-        ['custom', 'z1', 'z2', 'y'],
-        [inp.op.name for inp in fn_op3.inputs])
-    self.assertEqual(
-        [b'custom', b'z1', b'z2', b'y'],
-        [inp.op.get_attr('_user_specified_name') for inp in fn_op3.inputs])
+        y=_SCALAR_F32)
+    names, user_specified_names = _input_names(fn_op3)
+    self.assertEqual(['custom', 'z1', 'z2', 'y'], names)
+    self.assertEqual([b'custom', b'z1', b'z2', b'y'], user_specified_names)
 
   def testMethod(self, function_decorator):
     class HasMethod(object):
@@ -135,38 +117,34 @@ class ArgumentNamingTests(test.TestCase, parameterized.TestCase):
         return x
 
     has_method = HasMethod()
-    # Call the function to make def_function happy
-    HasMethod.method(has_method, array_ops.ones([]))
-    class_op = HasMethod.method.get_concrete_function(
-        has_method, tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32))
-    self.assertEqual(
-        ['x'],
-        [inp.op.name for inp in class_op.inputs])
-    self.assertEqual(
-        [b'x'],
-        [inp.op.get_attr('_user_specified_name') for inp in class_op.inputs])
-    # Call the function to make def_function happy
-    has_method.method(array_ops.ones([]))
-    method_op = has_method.method.get_concrete_function(
-        tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32))
-    self.assertEqual(
-        ['x'],
-        [inp.op.name for inp in method_op.inputs])
-    self.assertEqual(
-        [b'x'],
-        [inp.op.get_attr('_user_specified_name') for inp in method_op.inputs])
+    class_op = HasMethod.method.get_concrete_function(has_method, _SCALAR_F32)
+    names, user_specified_names = _input_names(class_op)
+    self.assertEqual(['x'], names)
+    self.assertEqual([b'x'], user_specified_names)
+    method_op = has_method.method.get_concrete_function(_SCALAR_F32)
+    names, user_specified_names = _input_names(method_op)
+    self.assertEqual(['x'], names)
+    self.assertEqual([b'x'], user_specified_names)
+
+  def testMethodNameOverride(self, function_decorator):
     # TODO(allenl): It should be possible to override names when exporting. Do
     # TensorSpec names need to go in cache keys? Or maybe get_concrete_function
     # should always retrace?
     self.skipTest('Not working')
+
+    class HasMethod(object):
+
+      @function_decorator
+      def method(self, x):
+        return x
+
+    has_method = HasMethod()
+    has_method.method.get_concrete_function(_SCALAR_F32)
     method_op = has_method.method.get_concrete_function(
         tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32, name='y'))
-    self.assertEqual(
-        ['y'],
-        [inp.op.name for inp in method_op.inputs])
-    self.assertEqual(
-        [b'y'],
-        [inp.op.get_attr('_user_specified_name') for inp in method_op.inputs])
+    names, user_specified_names = _input_names(method_op)
+    self.assertEqual(['y'], names)
+    self.assertEqual([b'y'], user_specified_names)
 
   def testMethodSignature(self, function_decorator):
 
@@ -180,68 +158,48 @@ class ArgumentNamingTests(test.TestCase, parameterized.TestCase):
         return x
 
     has_method = HasMethod()
-    # Call the function to make def_function happy
-    has_method.method(array_ops.ones([], dtype=dtypes.float64))
     method_op = has_method.method.get_concrete_function()
-    self.assertEqual(
-        ['y'],
-        [inp.op.name for inp in method_op.inputs])
-    self.assertEqual(
-        [b'y'],
-        [inp.op.get_attr('_user_specified_name') for inp in method_op.inputs])
-    method_op2 = has_method.method.get_concrete_function()
-    self.assertEqual(
-        ['y'],
-        [inp.op.name for inp in method_op2.inputs])
-    self.assertEqual(
-        [b'y'],
-        [inp.op.get_attr('_user_specified_name') for inp in method_op2.inputs])
+    names, user_specified_names = _input_names(method_op)
+    self.assertEqual(['y'], names)
+    self.assertEqual([b'y'], user_specified_names)
+    self.assertIs(method_op, has_method.method.get_concrete_function())
 
   def testVariadic(self, function_decorator):
     @function_decorator
     def variadic_fn(x, *args, **kwargs):
-      return x + math_ops.add_n(list(args) + list(kwargs.values()))
+      return x + math_ops.add_n(args + tuple(kwargs.values()))
 
-    # Call the function to make def_function happy
-    variadic_fn(array_ops.ones([]), array_ops.ones([]))
     variadic_op = variadic_fn.get_concrete_function(
-        tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32),
+        _SCALAR_F32,
         tensor_spec.TensorSpec(shape=None, dtype=dtypes.float32, name='y'),
-        tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32),
+        _SCALAR_F32,
         tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32,
                                name='second_variadic'),
-        z=tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32),
+        z=_SCALAR_F32,
         zz=tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32, name='cust'))
+    names, user_specified_names = _input_names(variadic_op)
     self.assertEqual(
-        ['x', 'y', 'args_1', 'second_variadic', 'z', 'cust'],
-        [inp.op.name for inp in variadic_op.inputs])
+        ['x', 'y', 'args_1', 'second_variadic', 'z', 'cust'], names)
     self.assertEqual(
         [b'x', b'y', b'args_1', b'second_variadic', b'z', b'cust'],
-        [inp.op.get_attr('_user_specified_name') for inp in variadic_op.inputs])
+        user_specified_names)
 
   def testVariadicInputSignature(self, function_decorator):
     @function_decorator(
         input_signature=(
             tensor_spec.TensorSpec(shape=None, dtype=dtypes.float32),
             tensor_spec.TensorSpec(shape=None, dtype=dtypes.float32, name='y'),
-            tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32),
+            _SCALAR_F32,
             tensor_spec.TensorSpec(shape=(), dtype=dtypes.float32, name='z'),
         ))
     def variadic_fn(x, *args):
-      return x + math_ops.add_n(list(args))
+      return x + math_ops.add_n(args)
 
-    # Call the function to make def_function happy
-    variadic_fn(array_ops.ones([]), array_ops.ones([]),
-                array_ops.ones([]), array_ops.ones([]))
     variadic_op = variadic_fn.get_concrete_function()
     self.assertIn(b'variadic_fn', variadic_op.name)
-    self.assertEqual(
-        ['x', 'y', 'args_1', 'z'],
-        [inp.op.name for inp in variadic_op.inputs])
-    self.assertEqual(
-        [b'x', b'y', b'args_1', b'z'],
-        [inp.op.get_attr('_user_specified_name')
-         for inp in variadic_op.inputs])
+    names, user_specified_names = _input_names(variadic_op)
+    self.assertEqual(['x', 'y', 'args_1', 'z'], names)
+    self.assertEqual([b'x', b'y', b'args_1', b'z'], user_specified_names)
 
 
 if __name__ == '__main__':
@@ -28,6 +28,7 @@ from tensorflow.python.framework import constant_op
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops
 from tensorflow.python.framework import tensor_shape
+from tensorflow.python.framework import tensor_spec
 from tensorflow.python.framework import test_util
 from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import control_flow_ops
@@ -48,6 +49,48 @@ _COS_DERIVATIVES = [math_ops.cos,
                     math_ops.sin,
                     math_ops.cos]
 
+def _make_middle_fn():
+  """Returns a fresh `a * (a + b)` function built from nested functions."""
+
+  @def_function.function
+  def inner_inner_fn(a, b):
+    return math_ops.add(a, b)
+
+  @def_function.function
+  def inner_fn(a, b):
+    return inner_inner_fn(a, b)
+
+  @def_function.function
+  def middle_fn(a, b):
+    return a * inner_fn(a, b)
+
+  return middle_fn
+
+
+def _gradients_function_gradient(f, x):
+  return backprop.gradients_function(f, [0])(x)[0]
+
+
+def _tape_gradient(f, x):
+  with backprop.GradientTape() as tp:
+    tp.watch(x)
+    result = f(x)
+  return tp.gradient(result, x)
+
+
+def _symbolic_gradient(f, x):
+  return gradients_impl.gradients(f(x), [x])[0]
+
+
+def _call_in_function(f):
+  """Returns a `def_function.function` that forwards its argument to `f`."""
+
+  @def_function.function
+  def call(x):
+    return f(x)
+
+  return call
+
 
 class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
 
@@ -62,6 +105,9 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
         context.LogicalDeviceConfiguration()
     ])
 
+  def _assertScalarEqual(self, tensor, expected):
+    self.assertEqual(float(self.evaluate(tensor)), expected)
+
   def testGraphModeWithGradients(self):
     v = resource_variable_ops.ResourceVariable(1.0, name='v')
 
@@ -273,7 +319,8 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
   @test_util.run_in_graph_and_eager_modes()
   def testDefunCondGradient(self):
 
-    @def_function.function
+    @def_function.function(
+        input_signature=[tensor_spec.TensorSpec([], dtypes.float32)])
     def f(x):
       return control_flow_ops.cond(x > 0.5, lambda: 2 * x, lambda: 3 * x)
 
@@ -286,7 +333,8 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
   @test_util.run_in_graph_and_eager_modes()
   def testGraphLoopGradient(self):
 
-    @def_function.function
+    @def_function.function(
+        input_signature=[tensor_spec.TensorSpec([], dtypes.float32)])
     def f(x):
       return control_flow_ops.while_loop(lambda _, i: i < 2,
                                          lambda x, i: (2*x, i + 1),
@@ -323,7 +371,8 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
     def f():
       return v * v
 
-    self.assertAllEqual(backprop.implicit_grad(f)()[0][0], 2.0)
+    f_concrete = f.get_concrete_function()
+    self.assertAllEqual(backprop.implicit_grad(f_concrete)()[0][0], 2.0)
 
   def testDefunCanBeDifferentiatedTwice(self):
     v = resource_variable_ops.ResourceVariable(1.0)
@@ -332,9 +381,10 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
     def f():
       return v * v
 
-    self.assertAllEqual(backprop.implicit_grad(f)()[0][0], 2.0)
+    f_concrete = f.get_concrete_function()
+    self.assertAllEqual(backprop.implicit_grad(f_concrete)()[0][0], 2.0)
     # Ensure that v is watched again.
-    self.assertAllEqual(backprop.implicit_grad(f)()[0][0], 2.0)
+    self.assertAllEqual(backprop.implicit_grad(f_concrete)()[0][0], 2.0)
 
   def testSymbolicGradientVariableNoneNotZerosLike(self):
     with ops.Graph().as_default():
@@ -354,11 +404,13 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
 
   def testDefunCallBackprop(self):
 
-    @def_function.function
+    @def_function.function(
+        input_signature=[tensor_spec.TensorSpec([], dtypes.float32)])
     def f(x):
       return math_ops.add(x, x)
 
-    @def_function.function
+    @def_function.function(
+        input_signature=[tensor_spec.TensorSpec([], dtypes.float32)])
     def g(x):
       return backprop.gradients_function(f, [0])(x)[0]
 
@@ -382,12 +434,9 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
     def g(x):
       return backprop.gradients_function(math_ops.multiply, [0, 1])(x, x)
 
-    def np_g(x):
-      return [d.numpy() for d in g(x)]
-
     x = constant_op.constant(1.)
-    self.assertAllEqual([1., 1.], np_g(x))
-    self.assertAllEqual([1., 1.], np_g(1.))
+    self.assertAllEqual([1., 1.], g(x))
+    self.assertAllEqual([1., 1.], g(1.))
 
   def testGradientTensorConversionWithDefun(self):
     three = resource_variable_ops.ResourceVariable(3.0, name='v')
@@ -403,10 +452,13 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
     self.assertAllEqual(g, 1.0)
 
   def testGradient(self):
-    matmul = def_function.function(math_ops.matmul)
+    matmul = def_function.function(math_ops.matmul).get_concrete_function(
+        tensor_spec.TensorSpec([2, 2], dtypes.float32),
+        tensor_spec.TensorSpec([2, 2], dtypes.float32),
+        transpose_a=True)
 
     def sq(x):
-      return matmul(x, x, transpose_a=True)
+      return matmul(x, x)
 
     t = constant_op.constant([[1.0, 2.0], [3.0, 4.0]])
     grad_t, = backprop.gradients_function(sq, [0])(t)
@@ -414,7 +466,8 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
 
   def testGradientInFunction(self):
 
-    @def_function.function
+    @def_function.function(
+        input_signature=[tensor_spec.TensorSpec([], dtypes.float32)])
     def f(x):
       return backprop.gradients_function(lambda y: y * y, [0])(x)[0]
 
@@ -482,32 +535,6 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
 
     self.assertAllEqual(grad, 2 * 5.0 + 1.0)
 
-  @test_util.run_in_graph_and_eager_modes
-  def testDeeplyNestedDifferentiableFunction(self):
-    @def_function.function
-    def inner_inner_fn(a, b):
-      return math_ops.add(a, b)
-
-    @def_function.function
-    def inner_fn(a, b):
-      return inner_inner_fn(a, b)
-
-    @def_function.function
-    def middle_fn(a, b):
-      return a * inner_fn(a, b)
-
-    @def_function.function
-    def outer_fn(x):
-      return middle_fn(x, 1.0)
-
-    x = constant_op.constant(5.0)
-    with backprop.GradientTape() as tp:
-      tp.watch(x)
-      result = outer_fn(x)
-    grad = tp.gradient(result, x)
-
-    self.assertAllEqual(grad, 2 * 5.0 + 1.0)
-
   @test_util.run_in_graph_and_eager_modes
   def testDeeplyNestedDifferentiableFunctionWithMultipleGradCalls(self):
     @def_function.function
@@ -522,221 +549,56 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
     def outer_fn(x):
       return middle_fn(x, 3.0)
 
+    outer_fn_gradient = backprop.gradients_function(outer_fn, [0])
+
     x = constant_op.constant(5.0)
-    self.assertAllEqual(outer_fn(x), 5.0 * (5.0 + 3.0))
+    self._assertScalarEqual(outer_fn(x), 5.0 * (5.0 + 3.0))
 
-    with backprop.GradientTape() as tp:
-      tp.watch(x)
-      result = outer_fn(x)
-    grad = tp.gradient(result, x)
+    grad, = outer_fn_gradient(x)
 
-    self.assertAllEqual(grad, 2 * 5.0 + 3.0)
-    self.assertAllEqual(outer_fn(x), 5.0 * (5.0 + 3.0))
-    self.assertAllEqual(middle_fn(3.0, x), 3.0 * (3.0 + 5.0))
+    self._assertScalarEqual(grad, 2 * 5.0 + 3.0)
+    self._assertScalarEqual(outer_fn(x), 5.0 * (5.0 + 3.0))
+    self._assertScalarEqual(middle_fn(3.0, x), 3.0 * (3.0 + 5.0))
 
-    with backprop.GradientTape() as tp:
-      tp.watch(x)
-      result = outer_fn(x)
-    grad = tp.gradient(result, x)
+    grad, = outer_fn_gradient(x)
 
-    self.assertAllEqual(grad, 2 * 5.0 + 3.0)
+    self._assertScalarEqual(grad, 2 * 5.0 + 3.0)
 
     y = constant_op.constant(4.0)
-    with backprop.GradientTape() as tp:
-      tp.watch(y)
-      result = outer_fn(y)
-    grad = tp.gradient(result, y)
+    grad, = outer_fn_gradient(y)
 
-    self.assertAllEqual(grad, 2 * 4.0 + 3.0)
+    self._assertScalarEqual(grad, 2 * 4.0 + 3.0)
 
     with backprop.GradientTape() as tp:
       tp.watch(y)
       result = inner_fn(y, y)
     grad = tp.gradient(result, y)
 
-    self.assertAllEqual(grad, 2.0)
+    self._assertScalarEqual(grad, 2.0)
 
+  @parameterized.named_parameters(
+      ('GradientsFunction', _gradients_function_gradient, 0),
+      ('GradientTapeInDefun', _tape_gradient, 1),
+      ('GradientTapeInNestedDefun', _tape_gradient, 2),
+      ('GradientTapeInMultNestedDefun', _tape_gradient, 3),
+      ('TFGradientInDefun', _symbolic_gradient, 1),
+      ('TFGradientInNestedDefun', _symbolic_gradient, 2),
+      ('TFGradientInMultNestedDefun', _symbolic_gradient, 3))
   @test_util.run_in_graph_and_eager_modes
-  def testDeeplyNestedDifferentiableFunctionGradientTapeInDefun(self):
-    @def_function.function
-    def inner_inner_fn(a, b):
-      return math_ops.add(a, b)
-
-    @def_function.function
-    def inner_fn(a, b):
-      return inner_inner_fn(a, b)
-
-    @def_function.function
-    def middle_fn(a, b):
-      return a * inner_fn(a, b)
-
-    @def_function.function
-    def outer_fn(x):
-      with backprop.GradientTape() as tp:
-        tp.watch(x)
-        result = middle_fn(x, 1.0)
-      grad = tp.gradient(result, x)
-      return grad
+  def testDeeplyNestedDifferentiableFunction(self, gradient_fn, depth):
+    middle_fn = _make_middle_fn()
+    # `depth` is the number of functions wrapped around the gradient call.
+    outer_fn = lambda x: gradient_fn(lambda y: middle_fn(y, 1.0), x)
+    for _ in range(depth):
+      outer_fn = _call_in_function(outer_fn)
 
     x = constant_op.constant(5.0)
     grad = outer_fn(x)
-    self.assertAllEqual(grad, 2 * 5.0 + 1.0)
-
-  @test_util.run_in_graph_and_eager_modes
-  def testDeeplyNestedDifferentiableFunctionGradientTapeInNestedDefun(self):
-    @def_function.function
-    def inner_inner_fn(a, b):
-      return math_ops.add(a, b)
-
-    @def_function.function
-    def inner_fn(a, b):
-      return inner_inner_fn(a, b)
-
-    @def_function.function
-    def middle_fn(a, b):
-      return a * inner_fn(a, b)
-
-    @def_function.function
-    def almost_outer_fn(x):
-      with backprop.GradientTape() as tp:
-        tp.watch(x)
-        result = middle_fn(x, 1.0)
-      grad = tp.gradient(result, x)
-      return grad
-
-    @def_function.function
-    def outer_fn(x):
-      return almost_outer_fn(x)
-
-    x = constant_op.constant(5.0)
-    grad = outer_fn(x)
-    self.assertAllEqual(grad, 2 * 5.0 + 1.0)
-
-  @test_util.run_in_graph_and_eager_modes
-  def testDeeplyNestedDifferentiableFunctionGradientTapeInMultNestedDefun(self):
-    @def_function.function
-    def inner_inner_fn(a, b):
-      return math_ops.add(a, b)
-
-    @def_function.function
-    def inner_fn(a, b):
-      return inner_inner_fn(a, b)
-
-    @def_function.function
-    def middle_fn(a, b):
-      return a * inner_fn(a, b)
-
-    @def_function.function
-    def almost_outer_fn(x):
-      with backprop.GradientTape() as tp:
-        tp.watch(x)
-        result = middle_fn(x, 1.0)
-      grad = tp.gradient(result, x)
-      return grad
-
-    @def_function.function
-    def outer_fn(x):
-      return almost_outer_fn(x)
-
-    @def_function.function
-    def outer_outer_fn(x):
-      return outer_fn(x)
-
-    x = constant_op.constant(5.0)
-    grad = outer_outer_fn(x)
-    self.assertAllEqual(grad, 2 * 5.0 + 1.0)
-
-  @test_util.run_in_graph_and_eager_modes
-  def testDeeplyNestedDifferentiableFunctionTFGradientInDefun(self):
-    @def_function.function
-    def inner_inner_fn(a, b):
-      return math_ops.add(a, b)
-
-    @def_function.function
-    def inner_fn(a, b):
-      return inner_inner_fn(a, b)
-
-    @def_function.function
-    def middle_fn(a, b):
-      return a * inner_fn(a, b)
-
-    @def_function.function
-    def outer_fn(x):
-      result = middle_fn(x, 1.0)
-      return gradients_impl.gradients(result, [x])[0]
-
-    x = constant_op.constant(5.0)
-    grad = outer_fn(x)
-    self.assertAllEqual(grad, 2 * 5.0 + 1.0)
-
-  @test_util.run_in_graph_and_eager_modes
-  def testDeeplyNestedDifferentiableFunctionTFGradientInNestedDefun(self):
-    @def_function.function
-    def inner_inner_fn(a, b):
-      return math_ops.add(a, b)
-
-    @def_function.function
-    def inner_fn(a, b):
-      return inner_inner_fn(a, b)
-
-    @def_function.function
-    def middle_fn(a, b):
-      return a * inner_fn(a, b)
-
-    @def_function.function
-    def almost_outer_fn(x):
-      result = middle_fn(x, 1.0)
-      return gradients_impl.gradients(result, [x])[0]
-
-    @def_function.function
-    def outer_fn(x):
-      return almost_outer_fn(x)
-
-    x = constant_op.constant(5.0)
-    grad = outer_fn(x)
-    self.assertAllEqual(grad, 2 * 5.0 + 1.0)
-
-  @test_util.run_in_graph_and_eager_modes
-  def testDeeplyNestedDifferentiableFunctionTFGradientInMultNestedDefun(self):
-    @def_function.function
-    def inner_inner_fn(a, b):
-      return math_ops.add(a, b)
-
-    @def_function.function
-    def inner_fn(a, b):
-      return inner_inner_fn(a, b)
-
-    @def_function.function
-    def middle_fn(a, b):
-      return a * inner_fn(a, b)
-
-    @def_function.function
-    def almost_outer_fn(x):
-      result = middle_fn(x, 1.0)
-      return gradients_impl.gradients(result, [x])[0]
-
-    @def_function.function
-    def outer_fn(x):
-      return almost_outer_fn(x)
-
-    @def_function.function
-    def outer_outer_fn(x):
-      return outer_fn(x)
-
-    x = constant_op.constant(5.0)
-    grad = outer_outer_fn(x)
-    self.assertAllEqual(grad, 2 * 5.0 + 1.0)
+    self._assertScalarEqual(grad, 2 * 5.0 + 1.0)
 
   def testDeeplyNestedDifferentiableFunctionWithVariable(self):
     var = variables.Variable(constant_op.constant(1.0))
-
-    @def_function.function
-    def inner_fn(a, b):
-      return math_ops.add(a, b)
-
-    @def_function.function
-    def middle_fn(a, b):
-      return a * inner_fn(a, b)
+    middle_fn = _make_middle_fn()
 
     @def_function.function
     def outer_fn(x):
@@ -748,7 +610,7 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
       result = outer_fn(x)
     grad = tp.gradient(result, x)
 
-    self.assertAllEqual(grad, 2 * 5.0 + 1.0)
+    self._assertScalarEqual(grad, 2 * 5.0 + 1.0)
 
   def testDeeplyNestedDifferentiableFunctionWithVariableMultipleGradCalls(self):
     v = variables.Variable(constant_op.constant(3.0))
@@ -766,46 +628,47 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
       return middle_fn(x, v)
 
     x = constant_op.constant(5.0)
-    self.assertAllEqual(outer_fn(x), 5.0 * (5.0 + 3.0))
+    outer_fn_concrete = outer_fn.get_concrete_function(x)
+    self._assertScalarEqual(outer_fn_concrete(x), 5.0 * (5.0 + 3.0))
 
     with backprop.GradientTape() as tp:
       tp.watch(x)
-      result = outer_fn(x)
+      result = outer_fn_concrete(x)
     grad = tp.gradient(result, x)
 
-    self.assertAllEqual(grad, 2 * 5.0 + 3.0)
-    self.assertAllEqual(outer_fn(x), 5.0 * (5.0 + 3.0))
-    self.assertAllEqual(middle_fn(v, x), 3.0 * (3.0 + 5.0))
+    self._assertScalarEqual(grad, 2 * 5.0 + 3.0)
+    self._assertScalarEqual(outer_fn_concrete(x), 5.0 * (5.0 + 3.0))
+    self._assertScalarEqual(middle_fn(v, x), 3.0 * (3.0 + 5.0))
 
     with backprop.GradientTape() as tp:
       tp.watch(x)
-      result = outer_fn(x)
+      result = outer_fn_concrete(x)
     grad = tp.gradient(result, x)
 
-    self.assertAllEqual(grad, 2 * 5.0 + 3.0)
+    self._assertScalarEqual(grad, 2 * 5.0 + 3.0)
 
     y = constant_op.constant(4.0)
     with backprop.GradientTape() as tp:
       tp.watch(y)
-      result = outer_fn(y)
+      result = outer_fn_concrete(y)
     grad = tp.gradient(result, y)
 
-    self.assertAllEqual(grad, 2 * 4.0 + 3.0)
+    self._assertScalarEqual(grad, 2 * 4.0 + 3.0)
 
     v.assign(constant_op.constant(1.5))
     with backprop.GradientTape() as tp:
       tp.watch(y)
-      result = outer_fn(y)
+      result = outer_fn_concrete(y)
     grad = tp.gradient(result, y)
 
-    self.assertAllEqual(grad, 2 * 4.0 + 1.5)
+    self._assertScalarEqual(grad, 2 * 4.0 + 1.5)
 
     with backprop.GradientTape() as tp:
       tp.watch(y)
       result = inner_fn(y, v)
     grad = tp.gradient(result, y)
 
-    self.assertAllEqual(grad, 1.0)
+    self._assertScalarEqual(grad, 1.0)
 
   def testDeeplyNestedDifferentiableFunctionWithVariableMultipleTFGrads(self):
     with context.graph_mode(), self.cached_session():
@@ -825,29 +688,30 @@ class FunctionGradientsTest(test.TestCase, parameterized.TestCase):
         return middle_fn(x, v)
 
       x = constant_op.constant(5.0)
-      self.assertAllEqual(outer_fn(x), 5.0 * (5.0 + 3.0))
+      outer_fn_concrete = outer_fn.get_concrete_function(x)
+      self._assertScalarEqual(outer_fn_concrete(x), 5.0 * (5.0 + 3.0))
 
-      grad, = gradients_impl.gradients(outer_fn(x), x)
+      grad, = gradients_impl.gradients(outer_fn_concrete(x), x)
 
-      self.assertAllEqual(grad, 2 * 5.0 + 3.0)
-      self.assertAllEqual(outer_fn(x), 5.0 * (5.0 + 3.0))
-      self.assertAllEqual(middle_fn(v, x), 3.0 * (3.0 + 5.0))
+      self._assertScalarEqual(grad, 2 * 5.0 + 3.0)
+      self._assertScalarEqual(outer_fn_concrete(x), 5.0 * (5.0 + 3.0))
+      self._assertScalarEqual(middle_fn(v, x), 3.0 * (3.0 + 5.0))
 
-      grad, = gradients_impl.gradients(outer_fn(x), x)
+      grad, = gradients_impl.gradients(outer_fn_concrete(x), x)
 
-      self.assertAllEqual(grad, 2 * 5.0 + 3.0)
+      self._assertScalarEqual(grad, 2 * 5.0 + 3.0)
 
       y = constant_op.constant(4.0)
-      grad, = gradients_impl.gradients(outer_fn(y), y)
-      self.assertAllEqual(grad, 2 * 4.0 + 3.0)
+      grad, = gradients_impl.gradients(outer_fn_concrete(y), y)
+      self._assertScalarEqual(grad, 2 * 4.0 + 3.0)
 
       self.evaluate(v.assign(constant_op.constant(1.5)))
-      grad, = gradients_impl.gradients(outer_fn(y), y)
+      grad, = gradients_impl.gradients(outer_fn_concrete(y), y)
 
-      self.assertAllEqual(grad, 2 * 4.0 + 1.5)
+      self._assertScalarEqual(grad, 2 * 4.0 + 1.5)
 
       grad, = gradients_impl.gradients(inner_fn(y, v), y)
-      self.assertAllEqual(grad, 1.0)
+      self._assertScalarEqual(grad, 1.0)
 
   def testNestedDifferentiableFunctionNoneOutputs(self):
     @def_function.function
@@ -18,6 +18,7 @@ from __future__ import division
 from __future__ import print_function
 
 import collections
+import contextlib
 import copy
 import functools
 import itertools
@@ -94,10 +95,31 @@ except ImportError:
   attr = None
 
 
+_Pair = collections.namedtuple('pair', ['a', 'b'])
+
+_SPEC_2D_F32 = tensor_spec.TensorSpec((None, None), dtypes.float32)
+_SPEC_UNKNOWN_F32 = tensor_spec.TensorSpec(None, dtypes.float32)
+
+
+# Shared by the matmul tests so they all hit a single trace cache.
+_MATMUL = def_function.function(math_ops.matmul)
+
+
 def total_function_cache(defined):
   # pylint: disable=protected-access
   return (set(defined._function_cache.primary)
           | set(defined._function_cache.arg_relaxed))
+
+
+@contextlib.contextmanager
+def _thread_pool(processes=8):
+  """Yields a `ThreadPool` that is closed and joined on exit."""
+  pool = multiprocessing.pool.ThreadPool(processes)
+  try:
+    yield pool
+  finally:
+    pool.close()
+    pool.join()
   # pylint: enable=protected-access
 
 
@@ -145,12 +167,11 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
     ])
 
   def testBasic(self):
-    matmul = def_function.function(math_ops.matmul)
     t = constant_op.constant([[1.0, 2.0], [3.0, 4.0]])
-    sq = matmul(t, t, transpose_a=True)
-    sq2 = matmul(sq, t, transpose_a=True)
-    self.assertAllEqual(sq.numpy().reshape(-1), [10, 14, 14, 20])
-    self.assertAllEqual(sq2.numpy().reshape(-1), [52, 76, 74, 108])
+    sq = _MATMUL(t, t, transpose_a=True)
+    sq2 = _MATMUL(sq, t, transpose_a=True)
+    self.assertAllEqual(sq, [[10, 14], [14, 20]])
+    self.assertAllEqual(sq2, [[52, 76], [74, 108]])
 
   def testOnExitCallback(self):
     values = []
@@ -679,45 +700,38 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
     self.assertEqual(add_2._name, 'add_2')
 
   def testBasicGraphMode(self):
-    matmul = def_function.function(math_ops.matmul)
 
     @def_function.function
     def sq(a):
-      return matmul(a, a)
+      return _MATMUL(a, a)
 
     t = constant_op.constant([[1.0, 2.0], [3.0, 4.0]])
     out = sq(t)
-    self.assertAllEqual(out, math_ops.matmul(t, t).numpy())
+    self.assertAllEqual(out, [[7.0, 10.0], [15.0, 22.0]])
 
   def testNestedInputsGraphMode(self):
-    matmul = def_function.function(math_ops.matmul)
-
-    pair = collections.namedtuple('pair', ['a', 'b'])
 
     @def_function.function
     def a_times_b(inputs):
-      return matmul(inputs.a['a'], inputs.b['b'])
+      return _MATMUL(inputs.a['a'], inputs.b['b'])
 
     t = constant_op.constant([[1.0, 2.0], [3.0, 4.0]])
 
-    out = a_times_b(pair({'a': t}, {'b': t}))
-    self.assertAllEqual(out, math_ops.matmul(t, t).numpy())
+    out = a_times_b(_Pair({'a': t}, {'b': t}))
+    self.assertAllEqual(out, [[7.0, 10.0], [15.0, 22.0]])
 
   def testNestedOutputsGraphMode(self):
-    matmul = def_function.function(math_ops.matmul)
-
-    pair = collections.namedtuple('pair', ['a', 'b'])
 
     @def_function.function()
     def pairs_mul(pair_a, pair_b):
-      return pair(matmul(pair_a.a, pair_b.a), matmul(pair_a.b, pair_b.b))
+      return _Pair(_MATMUL(pair_a.a, pair_b.a), _MATMUL(pair_a.b, pair_b.b))
 
     a = constant_op.constant([[1.0, 2.0], [1.0, 2.0]])
     b = constant_op.constant([[3.0, 4.0], [3.0, 4.0]])
 
-    out = pairs_mul(pair(a, b), pair(b, a))
-    expected = pair(math_ops.matmul(a, b).numpy(),
-                    math_ops.matmul(b, a).numpy())
+    out = pairs_mul(_Pair(a, b), _Pair(b, a))
+    expected = _Pair(math_ops.matmul(a, b).numpy(),
+                     math_ops.matmul(b, a).numpy())
     self.assertAllClose(out, expected)
 
   @parameterized.named_parameters(
@@ -761,18 +775,17 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
       self.assertEqual(f().shape, ())
 
   def testBasicGraphFunction(self):
-    matmul = def_function.function(math_ops.matmul)
 
     @def_function.function
     def sq(a):
-      return matmul(a, a)
+      return _MATMUL(a, a)
 
     t = constant_op.constant([[1.0, 2.0], [3.0, 4.0]])
 
     sq_op = sq.get_concrete_function(t)
     self.assertEqual(sq_op.output_shapes, tensor_shape.TensorShape([2, 2]))
     out = sq_op(t)
-    self.assertAllEqual(out, math_ops.matmul(t, t).numpy())
+    self.assertAllEqual(out, [[7.0, 10.0], [15.0, 22.0]])
 
   def testGetConcreteFunctionThreadSafety(self):
 
@@ -788,8 +801,8 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
       concrete_functions.append(cf)
 
     num_threads = 100
-    pool = multiprocessing.pool.ThreadPool(num_threads)
-    _ = pool.map(thread_func, list(range(num_threads)))
+    with _thread_pool(num_threads) as pool:
+      _ = pool.map(thread_func, list(range(num_threads)))
 
     self.assertLen(set(concrete_functions), 1)
 
@@ -798,43 +811,39 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
     def add_100(*args):
       return math_ops.add_n(args)
 
-    p = multiprocessing.pool.ThreadPool(2)
     args = (constant_op.constant(1.),) * 100
-    f1, f2 = p.map(add_100.get_concrete_function, [args] * 2)
+    with _thread_pool(2) as pool:
+      f1, f2 = pool.map(add_100.get_concrete_function, [args] * 2)
     # I see about len(args) + max(0, len(args) - 3) arguments expected.
     f1(*args)
     del f2
 
   def testInputSpecGraphFunction(self):
-    matmul = def_function.function(math_ops.matmul)
 
     @def_function.function
     def sq(a):
-      return matmul(a, a)
+      return _MATMUL(a, a)
 
-    sq_op = sq.get_concrete_function(
-        tensor_spec.TensorSpec((None, None), dtypes.float32))
+    sq_op = sq.get_concrete_function(_SPEC_2D_F32)
     self.assertEqual([None, None], sq_op.output_shapes.as_list())
 
     t1 = constant_op.constant([[1.0, 2.0], [3.0, 4.0]])
     out1 = sq_op(t1)
-    self.assertAllEqual(out1, math_ops.matmul(t1, t1).numpy())
+    self.assertAllEqual(out1, [[7.0, 10.0], [15.0, 22.0]])
 
     t2 = constant_op.constant([[1.0, 2.0], [3.0, 4.0]])
     out2 = sq_op(t2)
-    self.assertAllEqual(out2, math_ops.matmul(t2, t2).numpy())
+    self.assertAllEqual(out2, [[7.0, 10.0], [15.0, 22.0]])
 
   def testNestedInputSpecGraphFunction(self):
-    matmul = def_function.function(math_ops.matmul)
 
     @def_function.function
     def sq(mats):
       ((a, b),) = mats
-      return matmul(a, b)
+      return _MATMUL(a, b)
 
     sq_op_autonamed = sq.get_concrete_function(
-        [(tensor_spec.TensorSpec((None, None), dtypes.float32),
-          tensor_spec.TensorSpec((None, None), dtypes.float32))])
+        [(_SPEC_2D_F32, _SPEC_2D_F32)])
     self.assertEqual([None, None], sq_op_autonamed.output_shapes.as_list())
 
     sq_op = sq.get_concrete_function(
@@ -857,10 +866,13 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
     def stateless(x):
       return math_ops.multiply(2.0, x)
 
-    pool = multiprocessing.pool.ThreadPool()
-    inputs = [constant_op.constant(1.0 * x) for x in range(100)]
-    outputs = [float(out) for out in pool.map(stateless, inputs)]
-    expected = [float(2.0 * x) for x in inputs]
+    # Feed the 100 values as 10 equally shaped batches so that the concurrent
+    # calls share a single trace and run one kernel per batch.
+    inputs = [constant_op.constant([1.0 * x for x in range(i, i + 10)])
+              for i in range(0, 100, 10)]
+    with _thread_pool() as pool:
+      outputs = [out.numpy().tolist() for out in pool.map(stateless, inputs)]
+    expected = [(2.0 * x).numpy().tolist() for x in inputs]
     self.assertSequenceEqual(outputs, expected)
 
   def testExecutingManyStatelessDefunsConcurrently(self):
@@ -870,10 +882,10 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
       del x
       return math_ops.multiply(2.0, 2.0)
 
-    pool = multiprocessing.pool.ThreadPool()
-    # `pool.map` below instantiates 100 functions, one for each object.
+    # `map` below instantiates 100 functions, one for each object.
     objects = [object() for _ in range(100)]
-    outputs = [float(out) for out in pool.map(stateless, objects)]
+    with _thread_pool() as pool:
+      outputs = [float(out) for out in pool.map(stateless, objects)]
     expected = [4.0] * 100
     self.assertSequenceEqual(outputs, expected)
 
@@ -886,9 +898,18 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
     def stateful(x):
       v.assign(x)
 
-    pool = multiprocessing.pool.ThreadPool()
     inputs = [constant_op.constant(0.0)] * 100
-    pool.map(stateful, inputs)
+    with _thread_pool() as pool:
+      pool.map(stateful, inputs)
+    self.assertEqual(float(v.read_value()), 0.0)
+
+    # Also run a concrete function traced on the main thread, so the workers
+    # only execute it.
+    v.assign(1.0)
+    stateful_concrete = stateful.get_concrete_function(
+        tensor_spec.TensorSpec((), dtypes.float32))
+    with _thread_pool() as pool:
+      pool.map(stateful_concrete, inputs)
     self.assertEqual(float(v.read_value()), 0.0)
 
   def testExecutingManyStatefulDefunsConcurrently(self):
@@ -900,9 +921,9 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
       del x
       return v.assign(0.0)
 
-    pool = multiprocessing.pool.ThreadPool()
-    # `pool.map` below instantiates 100 functions, one for each object.
-    pool.map(stateful, [object() for _ in range(100)])
+    # `map` below instantiates 100 functions, one for each object.
+    with _thread_pool() as pool:
+      pool.map(stateful, [object() for _ in range(100)])
     self.assertEqual(float(v.read_value()), 0.0)
 
   def testShareRendezvous(self):
@@ -972,28 +993,24 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
     self.assertAllEqual(f(), x)
 
   def testNestedInputsGraphFunction(self):
-    matmul = def_function.function(math_ops.matmul)
-
-    pair = collections.namedtuple('pair', ['a', 'b'])
 
     @def_function.function
     def a_times_b(inputs):
-      return matmul(inputs.a['a'], inputs.b['b'])
+      return _MATMUL(inputs.a['a'], inputs.b['b'])
 
     t = constant_op.constant([[1.0, 2.0], [3.0, 4.0]])
     sq_op = a_times_b.get_concrete_function(
-        pair(dict(a=tensor_spec.TensorSpec([2, 2], dtypes.float32, 'a')),
-             dict(b=tensor_spec.TensorSpec([2, 2], dtypes.float32, 'b'))))
+        _Pair(dict(a=tensor_spec.TensorSpec([2, 2], dtypes.float32, 'a')),
+              dict(b=tensor_spec.TensorSpec([2, 2], dtypes.float32, 'b'))))
     self.assertEqual(sq_op.output_shapes, tensor_shape.TensorShape([2, 2]))
     out = sq_op(a=t, b=t)
-    self.assertAllEqual(out, math_ops.matmul(t, t).numpy())
+    self.assertAllEqual(out, [[7.0, 10.0], [15.0, 22.0]])
 
   def testNestedOutputGraphFunction(self):
-    matmul = def_function.function(math_ops.matmul)
 
     @def_function.function
     def sq(a):
-      return (matmul(a, a), {'b': constant_op.constant(1.0)})
+      return (_MATMUL(a, a), {'b': constant_op.constant(1.0)})
 
     t = constant_op.constant([[1.0, 2.0], [3.0, 4.0]])
 
@@ -1004,7 +1021,7 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
     self.assertEqual(sq_op.output_dtypes,
                      (dtypes.float32, {'b': dtypes.float32}))
     (a, b) = sq_op(t)
-    self.assertAllEqual(a, math_ops.matmul(t, t).numpy())
+    self.assertAllEqual(a, [[7.0, 10.0], [15.0, 22.0]])
     self.assertAllEqual(b['b'].numpy(), 1.0)
 
   def testGraphFunctionNoneOutput(self):
@@ -1093,10 +1110,13 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
     self.assertLen(total_function_cache(defined), 1)
 
     # Test that the numpy array is properly an argument to the graph function.
-    self.assertEqual(1., defined(x=numpy.ones([])).numpy())
-    self.assertEqual(0., defined(x=numpy.zeros([])).numpy())
+    # The arrays match the dtype of the tensors below so all four calls share
+    # a single trace.
+    self.assertEqual(1., defined(x=numpy.ones([], numpy.float32)).numpy())
+    self.assertEqual(0., defined(x=numpy.zeros([], numpy.float32)).numpy())
     self.assertEqual(1., defined(x=array_ops.ones([])).numpy())
     self.assertEqual(0., defined(x=array_ops.zeros([])).numpy())
+    self.assertLen(total_function_cache(defined), 2)
 
   def testDefunCapturedInt32(self):
     x = constant_op.constant(1, dtype=dtypes.int32)
@@ -1236,8 +1256,7 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
     def f(a):
       return array_ops.reshape(a, [-1, 3])
 
-    signature = [tensor_spec.TensorSpec(None, dtypes.float32)]
-    compiled = def_function.function(f, input_signature=signature)
+    compiled = def_function.function(f, input_signature=[_SPEC_UNKNOWN_F32])
 
     @def_function.function
     def use_f():
@@ -1696,8 +1715,15 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
 
       self.assertEqual(1, int(self.evaluate(read())))
 
-  def testSequenceInputs(self):
-    clip_by_global_norm = def_function.function(clip_ops.clip_by_global_norm)
+  @parameterized.named_parameters(
+      dict(testcase_name='NoSignature', input_signature=None),
+      dict(testcase_name='WithSignature',
+           input_signature=[
+               [tensor_spec.TensorSpec([], dtypes.float32)] * 2,
+               tensor_spec.TensorSpec([], dtypes.float32)]))
+  def testSequenceInputs(self, input_signature):
+    clip_by_global_norm = def_function.function(
+        clip_ops.clip_by_global_norm, input_signature=input_signature)
     t_list = [constant_op.constant(1.0), constant_op.constant(2.0)]
     clipped_list, global_norm = clip_by_global_norm(t_list,
                                                     constant_op.constant(.2))
@@ -1918,10 +1944,10 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
       return
 
     defined = function.defun(func)
-    defined(Foo())
+    defined.get_concrete_function(Foo())
     self.assertLen(total_function_cache(defined), 1)
 
-    defined(Foo())
+    defined.get_concrete_function(Foo())
     self.assertLen(total_function_cache(defined), 2)
 
   def testCacheTensorDtypeCollision(self):
@@ -1931,11 +1957,11 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
 
     defined = function.defun(func)
     t = constant_op.constant([[1.0]], dtype=dtypes.complex64)
-    defined(t)
+    defined.get_concrete_function(t)
     self.assertLen(total_function_cache(defined), 1)
 
     t = constant_op.constant([[1.0]], dtype=dtypes.complex128)
-    defined(t)
+    defined.get_concrete_function(t)
     self.assertLen(total_function_cache(defined), 2)
 
   def testCacheTensorShapeCollision(self):
@@ -1945,11 +1971,11 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
 
     defined = function.defun(func)
     t = constant_op.constant([[1.0]], dtype=dtypes.complex64)
-    defined(t)
+    defined.get_concrete_function(t)
     self.assertLen(total_function_cache(defined), 1)
 
     t = constant_op.constant([1.0], dtype=dtypes.complex64)
-    defined(t)
+    defined.get_concrete_function(t)
     self.assertLen(total_function_cache(defined), 2)
 
   def testCacheTensorShapeDtypeCollision(self):
@@ -1959,11 +1985,11 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
 
     defined = function.defun(func)
     t = constant_op.constant([[1.0]], dtype=dtypes.complex64)
-    defined(t)
+    defined.get_concrete_function(t)
     self.assertLen(total_function_cache(defined), 1)
 
     t = constant_op.constant([1.0], dtype=dtypes.complex128)
-    defined(t)
+    defined.get_concrete_function(t)
     self.assertLen(total_function_cache(defined), 2)
 
   def testCacheTensorUnknownShapesCollisionRelaxedShapes(self):
@@ -2012,7 +2038,7 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
       return
 
     defined = function.defun(func)
-    defined(0, baz=20)
+    defined.get_concrete_function(0, baz=20)
 
     def cache_keys():
       """Sanitizes cache keys of non-input metadata."""
@@ -2021,23 +2047,23 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
     # `True` corresponds to the fact that we're executing eagerly
     self.assertIn(('URRRu', (0, 1, 20)), cache_keys())
 
-    defined(1)  # bar=1, baz=2
+    defined.get_concrete_function(1)  # bar=1, baz=2
     self.assertIn(('URRRu', (1, 1, 2)), cache_keys())
 
     # This matches the previous call.
-    defined(foo=1)
+    defined.get_concrete_function(foo=1)
     self.assertLen(total_function_cache(defined), 2)
 
-    defined(1, 2, 3)
+    defined.get_concrete_function(1, 2, 3)
     self.assertLen(total_function_cache(defined), 3)
     self.assertIn(('URRRu', (1, 2, 3)), cache_keys())
 
     # This matches the previous call.
-    defined(1, bar=2, baz=3)
+    defined.get_concrete_function(1, bar=2, baz=3)
     self.assertLen(total_function_cache(defined), 3)
 
     # This matches the previous call.
-    defined(1, baz=3, bar=2)
+    defined.get_concrete_function(1, baz=3, bar=2)
     self.assertLen(total_function_cache(defined), 3)
 
   def testFunctoolsPartialUnwrappedCorrectly(self):
@@ -2090,10 +2116,7 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
 
   def testInputSignatureWithCompatibleInputs(self):
 
-    rank2_spec = tensor_spec.TensorSpec(shape=(None, None),
-                                        dtype=dtypes.float32)
-
-    @function.defun(input_signature=[rank2_spec])
+    @function.defun(input_signature=[_SPEC_2D_F32])
     def func(a):
       self.assertEqual([None, None], a.shape.as_list())
       return array_ops.shape(a)
@@ -2560,13 +2583,13 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
         # pylint: disable=protected-access
         self.assertLen(graph._functions, 2)
         functions = list(graph._functions.values())
-        self.assertRegex(functions[0].definition.signature.name, '.*matmul.*')
+        self.assertIn('matmul', functions[0].definition.signature.name)
         attrs = functions[0].definition.attr
         self.assertLen(attrs, 2)
         self.assertEqual(attrs['experimental_1'].s, b'value1')
         self.assertEqual(attrs['experimental_2'].i, 2)
 
-        self.assertRegex(functions[1].definition.signature.name, '.*add.*')
+        self.assertIn('add', functions[1].definition.signature.name)
         attrs = functions[1].definition.attr
         self.assertLen(attrs, 2)
         self.assertEqual(attrs['experimental_3'].b, True)
@@ -2658,9 +2681,7 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
       return math_ops.add(x, y)
 
     py_add(array_ops.ones([]), array_ops.ones([]))
-    add = py_add.get_concrete_function(
-        tensor_spec.TensorSpec(None, dtypes.float32),
-        tensor_spec.TensorSpec(None, dtypes.float32))
+    add = py_add.get_concrete_function(_SPEC_UNKNOWN_F32, _SPEC_UNKNOWN_F32)
 
     @function_decorator
     def py_composite(x, y):
@@ -2668,8 +2689,7 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
 
     py_composite(array_ops.ones([]), array_ops.ones([]))
     composite = py_composite.get_concrete_function(
-        tensor_spec.TensorSpec(None, dtypes.float32),
-        tensor_spec.TensorSpec(None, dtypes.float32))
+        _SPEC_UNKNOWN_F32, _SPEC_UNKNOWN_F32)
 
     with context.graph_mode(), self.cached_session():
       with ops.get_default_graph().as_default():
@@ -2736,12 +2756,8 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
   def testRegisterFunctionWithInputSignature(self):
     def matmul(x, y):
       return math_ops.matmul(x, y)
-    defun_matmul = function.defun(
-        matmul,
-        input_signature=[
-            tensor_spec.TensorSpec(shape=(2, 2), dtype=dtypes.float32),
-            tensor_spec.TensorSpec(shape=(2, 2), dtype=dtypes.float32)
-        ])
+    spec = tensor_spec.TensorSpec(shape=(2, 2), dtype=dtypes.float32)
+    defun_matmul = function.defun(matmul, input_signature=[spec, spec])
     with context.graph_mode(), self.cached_session():
       with ops.get_default_graph().as_default():
         t = constant_op.constant([[1.0, 2.0], [3.0, 4.0]])
@@ -3288,8 +3304,7 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
     def func(x):
       return array_ops.shape(x)
 
-    @function.defun(
-        input_signature=[tensor_spec.TensorSpec([None, None], dtypes.float32)])
+    @function.defun(input_signature=[_SPEC_2D_F32])
     def calls_func(x):
       return func(x)
 
@@ -3365,9 +3380,7 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
       return array_ops.reshape(y, [n, x_batch, -1])
 
     conc = _uses_symbolic_shapes.get_concrete_function(
-        tensor_spec.TensorSpec(None, dtypes.float32),
-        tensor_spec.TensorSpec(None, dtypes.float32),
-        tensor_spec.TensorSpec(None, dtypes.float32))
+        _SPEC_UNKNOWN_F32, _SPEC_UNKNOWN_F32, _SPEC_UNKNOWN_F32)
 
     @def_function.function
     def _call_concrete():
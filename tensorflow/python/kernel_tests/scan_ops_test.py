@@ -31,14 +31,7 @@ from tensorflow.python.platform import test
 
 
 def numpy_reverse(x, axis):
-  length = len(x.shape)
-  if axis < 0:
-    axis = length + axis
-
-  ix = [
-      slice(None, None, -1) if i == axis else slice(None) for i in range(length)
-  ]
-  return x[ix]
+  return np.flip(x, axis=axis)
 
 
 def handle_options(func, x, axis, exclusive, reverse):
@@ -51,10 +44,10 @@ def handle_options(func, x, axis, exclusive, reverse):
     x = numpy_reverse(x, axis)
 
   if exclusive:
-    ix_head = [slice(0, 1) if i == axis else slice(None) for i in range(length)]
-    ix_init = [
-        slice(0, -1) if i == axis else slice(None) for i in range(length)
-    ]
+    ix_head = tuple(
+        slice(0, 1) if i == axis else slice(None) for i in range(length))
+    ix_init = tuple(
+        slice(0, -1) if i == axis else slice(None) for i in range(length))
     if func == np.cumsum:
       init = np.zeros_like(x[ix_head])
     elif func == np.cumprod: